@@ -52,7 +52,9 @@ class BaseSet:
         )
         if self._info:
             log.info(f"Loaded info file: {self.info_file}")
-            self.args = eKonf.merge(self.args, self._info)
+            # self.args is created in __init__ and owned here, so merge in place
+            # instead of cloning it through eKonf.merge
+            self.args.merge_with(self._info)
             self._info = eKonf.to_dict(self._info)
         self.filetype = self.args.get("filetype") or "parquet"
         self.filetype = "." + self.filetype.replace(".", "")
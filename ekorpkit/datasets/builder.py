@@ -1,7 +1,7 @@
 import logging
 
 from ekorpkit import eKonf
-from ekorpkit.pipelines.pipe import apply_pipeline
+from ekorpkit.pipelines.pipe import apply_pipeline, build_split_pipelines
 from hyfi.config import BaseBatchModel
 from hyfi.utils.func import elapsed_timer
 from .config import CorpusFeatures
@@ -82,21 +82,20 @@ class DatasetBuilder(BaseBatchModel):
         _meta_path_ = self._io_.meta.path[split_name]
         _sample_path_ = self._io_.sample.path[split_name]
 
-        pipe = "save_metadata"
-        if pipe in self._pipeline_:
-            if pipe not in self.transform_pipeline:
-                self.transform_pipeline.append(pipe)
-            self._pipeline_[pipe].path.output = _meta_path_
-            self._pipeline_[pipe].features = self.features
-            self._pipeline_[pipe].split_name = split_name
-        pipe = "save_samples"
-        if pipe in self._pipeline_:
-            if pipe not in self.process_pipeline:
-                self.process_pipeline.append(pipe)
-            self._pipeline_[pipe].path.output = _sample_path_
+        pipeline_args, transform_pipeline, process_pipeline = build_split_pipelines(
+            self._pipeline_,
+            self.transform_pipeline,
+            self.process_pipeline,
+            split_name,
+            _meta_path_,
+            _sample_path_,
+            features=self.features,
+        )
 
+        # resolve the interpolated output path once per split
+        data_filepath = _data_path_.filepath
         df = None
-        if not eKonf.exists(_data_path_.filepath) or self.force.build:
+        if not eKonf.exists(data_filepath) or self.force.build:
             with elapsed_timer(format_time=True) as elapsed:
                 df = eKonf.instantiate(self.loader, split_name=split_name)
                 logger.info(f" >> elapsed time to load and parse data: {elapsed()}")
@@ -108,11 +107,11 @@ class DatasetBuilder(BaseBatchModel):
                 print(df.head())
                 print(df.shape)
 
-            if self.transform_pipeline and len(self.transform_pipeline) > 0:
+            if transform_pipeline:
                 logger.info(
-                    f"\nTransforming dataframe with pipeline: {self.transform_pipeline}"
+                    f"\nTransforming dataframe with pipeline: {transform_pipeline}"
                 )
-                df = apply_pipeline(df, self.transform_pipeline, self._pipeline_)
+                df = apply_pipeline(df, transform_pipeline, pipeline_args)
 
             # Saving data
             columns = self.features.data
@@ -132,7 +131,7 @@ class DatasetBuilder(BaseBatchModel):
                 self.summary_info.init_stats(df=df, split_name=split_name, stats=stats)
 
         else:
-            logger.info(f"{_data_path_.filepath} already exists")
+            logger.info(f"{data_filepath} already exists")
             if self.force.summarize or self.force.preprocess:
                 df = eKonf.load_data(**_data_path_)
 
@@ -140,11 +139,9 @@ class DatasetBuilder(BaseBatchModel):
             logger.warning("No datasets found")
             return None
 
-        if self.process_pipeline and len(self.process_pipeline) > 0:
-            logger.info(
-                f"\nProcessing dataframe with pipeline: {self.process_pipeline}"
-            )
-            df = apply_pipeline(df, self.process_pipeline, self._pipeline_)
+        if process_pipeline:
+            logger.info(f"\nProcessing dataframe with pipeline: {process_pipeline}")
+            df = apply_pipeline(df, process_pipeline, pipeline_args)
 
         if self.force.summarize and self.summary_info:
             self.summary_info.calculate_stats(df, split_name)
@@ -1,5 +1,6 @@
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
 from pathlib import Path
 from random import sample
@@ -7,7 +8,7 @@ from typing import Dict, List, Optional, Union
 
 import numpy as np
 import pandas as pd
-from datasets import DatasetDict, load_dataset
+from datasets import DatasetDict, IterableDatasetDict, load_dataset
 from omegaconf import DictConfig
 from pandas import DataFrame
 from pydantic import BaseModel as PydanticBaseModel
@@ -122,11 +123,22 @@ class BaseDatasetConfig(BaseConfigModel):
         self.data_files = self.__info__.get("data_files") or self.data_files
         if self.data_files is None:
             self.data_files = {
-                SPLITS.TRAIN.value: f"{self.name}-train.{self.filetype}",
-                SPLITS.DEV.value: f"{self.name}-dev.{self.filetype}",
-                SPLITS.TEST.value: f"{self.name}-test.{self.filetype}",
+                SPLITS.TRAIN.value: self._default_data_file(SPLITS.TRAIN.value),
+                SPLITS.DEV.value: self._default_data_file(SPLITS.DEV.value),
+                SPLITS.TEST.value: self._default_data_file(SPLITS.TEST.value),
             }
 
+    def _default_data_file(self, split):
+        data_file = f"{self.name}-{split}.{self.filetype}"
+        # keep reading datasets that were saved as csv before parquet became the default
+        legacy_file = f"{self.name}-{split}.csv"
+        if not eKonf.exists(self.data_dir, data_file) and eKonf.exists(
+            self.data_dir, legacy_file
+        ):
+            log.info(f"Using legacy csv file {legacy_file} for split {split}")
+            return legacy_file
+        return data_file
+
     def load_features(self):
         self.__column__ = eKonf.instantiate(self.features)
 
@@ -242,26 +254,39 @@ class BaseDatasetConfig(BaseConfigModel):
     def load(self):
         if self.__loaded__:
             return
+        data_files = {}
         for split, data_file in self.data_files.items():
             if eKonf.exists(self.data_dir, data_file):
-                data = eKonf.load_data(
-                    data_file,
-                    self.data_dir,
-                    verbose=self.verbose,
-                    concatenate=True,
-                )
-                data = self.COLUMN.init_info(data)
-                data = self.COLUMN.append_split(data, split)
-                if self.collapse_ids:
-                    data = self.COLUMN.combine_ids(data)
-                self.splits[split] = data
-                if self.verbose:
-                    log.info(f"Data loaded {len(data)} rows")
-                    print(data.head(3))
-                    print(data.tail(3))
+                data_files[split] = data_file
             else:
                 log.warning(f"File {data_file} not found.")
                 # log.info(f"Dataset {self.name} split {split} is empty")
+        if data_files:
+            # reading the split files is I/O bound, so load them concurrently and
+            # keep the column bookkeeping below sequential
+            num_workers = min(len(data_files), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                futures = {
+                    split: executor.submit(
+                        eKonf.load_data,
+                        data_file,
+                        self.data_dir,
+                        verbose=self.verbose,
+                        concatenate=True,
+                    )
+                    for split, data_file in data_files.items()
+                }
+                for split, future in futures.items():
+                    data = future.result()
+                    data = self.COLUMN.init_info(data)
+                    data = self.COLUMN.append_split(data, split)
+                    if self.collapse_ids:
+                        data = self.COLUMN.combine_ids(data)
+                    self.splits[split] = data
+                    if self.verbose:
+                        log.info(f"Data loaded {len(data)} rows")
+                        print(data.head(3))
+                        print(data.tail(3))
         self.__loaded__ = True
 
     def summarize(self):
@@ -405,7 +430,14 @@ class DatasetConfig(BaseModel):
             "than this will be truncated."
         ),
     )
-    raw_datasets: Optional[DatasetDict] = Field(
+    streaming: bool = Field(
+        default=False,
+        description=(
+            "Whether to stream the datasets instead of downloading and caching them in full. "
+            "Percentage validation splits are not supported when streaming."
+        ),
+    )
+    raw_datasets: Optional[Union[DatasetDict, IterableDatasetDict]] = Field(
         default=None,
         description="The raw datasets loaded from the data sources.",
     )
@@ -458,8 +490,17 @@ class DatasetConfig(BaseModel):
         )
         if self.download_mode is not None:
             kwargs["download_mode"] = self.download_mode
+        if self.streaming:
+            kwargs["streaming"] = True
         return kwargs
 
+    @property
+    def split_percentage(self):
+        """The validation split percentage in effect, none when streaming."""
+        if self.streaming:
+            return None
+        return self.validation_split_percentage
+
     @property
     def data_source(self):
         dataset_kwargs = self.dataset_kwargs
@@ -470,8 +511,8 @@ class DatasetConfig(BaseModel):
     def train_data_source(self):
         if self.dataset_name is not None:
             dataset_kwargs = self.data_source
-            if self.validation_split_percentage:
-                dataset_kwargs["split"] = f"train[{self.validation_split_percentage}%:]"
+            if self.split_percentage:
+                dataset_kwargs["split"] = f"train[{self.split_percentage}%:]"
         elif self.train_file is not None:
             dataset_kwargs = self.dataset_kwargs
             if self.file_extension == "txt":
@@ -482,8 +523,8 @@ class DatasetConfig(BaseModel):
                 dataset_kwargs["data_files"] = self.train_file
             else:
                 dataset_kwargs["data_dir"] = self.train_file
-            if self.validation_file is None and self.validation_split_percentage:
-                dataset_kwargs["split"] = f"train[{self.validation_split_percentage}%:]"
+            if self.validation_file is None and self.split_percentage:
+                dataset_kwargs["split"] = f"train[{self.split_percentage}%:]"
             else:
                 dataset_kwargs["split"] = "train"
         else:
@@ -495,8 +536,8 @@ class DatasetConfig(BaseModel):
         dataset_kwargs = {}
         if self.dataset_name is not None:
             dataset_kwargs = self.data_source
-            if self.validation_split_percentage:
-                dataset_kwargs["split"] = f"train[:{self.validation_split_percentage}%]"
+            if self.split_percentage:
+                dataset_kwargs["split"] = f"train[:{self.split_percentage}%]"
         elif self.validation_file is not None:
             dataset_kwargs = self.dataset_kwargs
             if self.file_extension == "txt":
@@ -510,9 +551,9 @@ class DatasetConfig(BaseModel):
             else:
                 dataset_kwargs["data_dir"] = self.validation_file
             dataset_kwargs["split"] = "validation"
-        elif self.validation_split_percentage:
+        elif self.split_percentage:
             dataset_kwargs = self.train_data_source
-            dataset_kwargs["split"] = f"train[:{self.validation_split_percentage}%]"
+            dataset_kwargs["split"] = f"train[:{self.split_percentage}%]"
         return dataset_kwargs
 
     def load_datasets(
@@ -544,29 +585,33 @@ class DatasetConfig(BaseModel):
             self.text_column_name = "text"
 
         self._check_data_sources()
+        if self.streaming and self.validation_split_percentage:
+            log.warning(
+                "Percentage splits are not supported when streaming, "
+                "ignoring validation_split_percentage"
+            )
+        validation_split_percentage = self.split_percentage
         if self.dataset_name is not None:
             # Downloading and loading a dataset from the hub.
             logging.info(f"Loading dataset {self.dataset_name}")
             raw_datasets = load_dataset(**self.data_source)
-            if (
-                self.validation_split_percentage
-                and "validation" not in raw_datasets.keys()
-            ):
+            if validation_split_percentage and "validation" not in raw_datasets.keys():
                 raw_datasets["validation"] = load_dataset(**self.validation_data_source)
                 raw_datasets["train"] = load_dataset(**self.train_data_source)
         else:
-            raw_datasets = DatasetDict()
-            if self.validation_split_percentage or self.validation_file is not None:
+            raw_datasets = IterableDatasetDict() if self.streaming else DatasetDict()
+            if validation_split_percentage or self.validation_file is not None:
                 logging.info(f"Loading validation dataset {self.validation_file}")
                 raw_datasets["validation"] = load_dataset(**self.validation_data_source)
             logging.info(f"Loading training dataset {self.train_file}")
             raw_datasets["train"] = load_dataset(**self.train_data_source)
 
-        column_names = raw_datasets["train"].column_names
+        # streamed datasets may not know their columns before the first example
+        column_names = raw_datasets["train"].column_names or []
         text_column_name = self.text_column_name or "text"
-        self.text_column_name = (
-            text_column_name if text_column_name in column_names else column_names[0]
-        )
+        if column_names and text_column_name not in column_names:
+            text_column_name = column_names[0]
+        self.text_column_name = text_column_name
 
         if self.shuffle:
             log.info("Shuffling the dataset with seed %s", self.seed)
@@ -579,7 +624,7 @@ class DatasetConfig(BaseModel):
         return raw_datasets
 
     @property
-    def datasets(self) -> DatasetDict:
+    def datasets(self) -> Union[DatasetDict, IterableDatasetDict]:
         if self.raw_datasets is None:
             self.raw_datasets = self.load_datasets()
         return self.raw_datasets
@@ -158,6 +158,7 @@ class BatchConfig(BaseBatchConfig):
     max_display_image_width: int = 1000
     collage_dirname = "collages"
     collage_filesfx = "collage.png"
+    _collage_dir: Optional[Path] = PrivateAttr(default=None)
 
     def get_imagine_config(self, pair_args: dict = None, **imagine_args):
         args = imagine_args.copy()
@@ -168,8 +169,11 @@ class BatchConfig(BaseBatchConfig):
 
     @property
     def collage_dir(self):
-        collage_dir = self.batch_dir / self.collage_dirname
-        collage_dir.mkdir(parents=True, exist_ok=True)
+        # only hit the filesystem when the batch (and so the directory) changes
+        collage_dir = self.output_dir / self.batch_name / self.collage_dirname
+        if collage_dir != self._collage_dir:
+            collage_dir.mkdir(parents=True, exist_ok=True)
+            self._collage_dir = collage_dir
         return collage_dir
 
     @property
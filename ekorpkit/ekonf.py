@@ -84,6 +84,7 @@ class _Keys(str, Enum):
     INPUT = "input"
     TARGET_TEXT = "target_text"
     MODEL_OUTPUTS = "model_outputs"
+    LABEL_PROBS = "label_probs"
     LABELS = "labels"
     PREFIX = "prefix"
     FEATURES = "features"
@@ -103,3 +104,17 @@ class eKonf(HyFI):
     Defaults = Defaults
     Keys = _Keys
     SPLITS = SPLITS
+
+    @staticmethod
+    def unsafe_merge(*configs):
+        """
+        Merge a list of configs into a single one without copying the inputs.
+        The first config is modified in place and returned. Nodes of the other
+        configs are moved into the result instead of copied, so later writes to
+        the merged config show up in those inputs as well. Only use it when all
+        inputs are throwaway, e.g. a freshly composed config and a config just
+        created from keyword arguments with eKonf.to_config.
+        :param configs: Input configs
+        :return: the merged config object, which is the first config.
+        """
+        return OmegaConf.unsafe_merge(*configs)
@@ -9,10 +9,16 @@ log = logging.getLogger(__name__)
 class BaseInfo:
 
     Keys = eKonf.Keys
+    ID = eKonf.Keys.ID.value
+    _ID = eKonf.Keys._ID.value
+    ID_SEPARATOR = eKonf.Defaults.ID_SEP.value
+    DATASET = eKonf.Keys.DATASET.value
+    SPLIT = eKonf.Keys.SPLIT.value
 
     def __init__(self, **args):
         self.args = eKonf.to_config(args)
         self._initialized = False
+        self._data_columns = None
 
     def __str__(self):
         classname = self.__class__.__name__
@@ -92,9 +98,9 @@ class BaseInfo:
         if not isinstance(dataframes, list):
             dataframes = [dataframes]
         common_columns = list(set.intersection(*(set(df.columns) for df in dataframes)))
-        df = dataframes[0][common_columns].copy()
-        dtypes = df.dtypes.apply(lambda x: x.name).to_dict()
-        self.DATATYPEs = dtypes
+        # read the dtypes off the first frame without copying its data
+        dtypes = dataframes[0].dtypes[common_columns]
+        self.DATATYPEs = {col: dtype.name for col, dtype in dtypes.items()}
         return common_columns
 
     def to_datetime(self, data):
@@ -133,7 +139,7 @@ class BaseInfo:
             if self.DATASET not in self.IDs:
                 self.append_id(self.DATASET)
             if self.DATA and self.DATASET not in self.DATA:
-                self.DATATYPEs[self.DATASET] = "str"
+                self.set_datatype(self.DATASET, "str")
 
             log.info(f"Added a column [{self.DATASET}] with value [{_dataset}]")
 
@@ -148,26 +154,22 @@ class BaseInfo:
             if self.SPLIT not in self.IDs:
                 self.append_id(self.SPLIT)
             if self.DATA and self.SPLIT not in self.DATA:
-                self.DATATYPEs[self.SPLIT] = "str"
+                self.set_datatype(self.SPLIT, "str")
 
             log.info(f"Added a column [{self.SPLIT}] with value [{_split}]")
 
         return data
 
+    def set_datatype(self, column, dtype):
+        self.DATATYPEs[column] = dtype
+        self._data_columns = None
+
     def set_dtypes(self, data):
         if isinstance(data, pd.DataFrame):
-            dtypes = data.dtypes.apply(lambda x: x.name).to_dict()
+            dtypes = {col: dtype.name for col, dtype in data.dtypes.items()}
             self.DATATYPEs = dtypes
         return data
 
-    @property
-    def _ID(self):
-        return self.Keys._ID.value
-
-    @property
-    def ID_SEPARATOR(self):
-        return eKonf.Defaults.ID_SEP.value
-
     @property
     def INFO(self):
         return self.args
@@ -187,6 +189,7 @@ class BaseInfo:
     @DATATYPEs.setter
     def DATATYPEs(self, value):
         self.INFO[eKonf.Keys.DATA.value] = value
+        self._data_columns = None
 
     @property
     def COLUMNs(self):
@@ -198,13 +201,12 @@ class BaseInfo:
 
     @property
     def DATA(self):
-        if self.DATATYPEs is None:
-            return None
-        return list(self.DATATYPEs.keys())
-
-    @property
-    def DATASET(self):
-        return eKonf.Keys.DATASET.value
+        # cached until the data types are changed through DATATYPEs or set_datatype
+        if self._data_columns is None:
+            if self.DATATYPEs is None:
+                return None
+            self._data_columns = list(self.DATATYPEs.keys())
+        return self._data_columns
 
     @property
     def INDEX(self):
@@ -214,10 +216,6 @@ class BaseInfo:
     def INDEX(self, value):
         self.COLUMNs[eKonf.Keys.INDEX.value] = value
 
-    @property
-    def ID(self):
-        return eKonf.Keys.ID.value
-
     @property
     def IDs(self):
         return eKonf.ensure_list(self.COLUMNs.get(self.ID))
@@ -226,12 +224,13 @@ class BaseInfo:
     def IDs(self, value):
         self.COLUMNs[self.ID] = value
 
-    @property
-    def SPLIT(self):
-        return eKonf.Keys.SPLIT.value
-
 
 class CorpusInfo(BaseInfo):
+
+    TEXT = eKonf.Keys.TEXT.value
+    TIMESTAMP = eKonf.Keys.TIMESTAMP.value
+    CORPUS = eKonf.Keys.CORPUS.value
+
     def __init__(self, **args):
         super().__init__(**args)
 
@@ -275,7 +274,7 @@ class CorpusInfo(BaseInfo):
                 self.DATATYPEs = {
                     k: v for k, v in self.DATATYPEs.items() if k not in self.TEXTs
                 }
-                self.DATATYPEs[self.TEXT] = "str"
+                self.set_datatype(self.TEXT, "str")
 
         return data
 
@@ -309,7 +308,7 @@ class CorpusInfo(BaseInfo):
             if self.CORPUS not in self.IDs:
                 self.append_id(self.CORPUS)
             if self.DATA and self.CORPUS not in self.DATA:
-                self.DATATYPEs[self.CORPUS] = "str"
+                self.set_datatype(self.CORPUS, "str")
             if self.METADATA and self.CORPUS not in self.METADATA:
                 self.METATYPEs[self.CORPUS] = "str"
 
@@ -325,10 +324,6 @@ class CorpusInfo(BaseInfo):
     def MERGE_META_ON(self, value):
         self.COLUMNs[eKonf.Keys.META_MERGE_ON.value] = value
 
-    @property
-    def TEXT(self):
-        return eKonf.Keys.TEXT.value
-
     @property
     def TEXTs(self):
         return eKonf.ensure_list(self.COLUMNs.get(self.TEXT))
@@ -343,14 +338,6 @@ class CorpusInfo(BaseInfo):
             return None
         return list(self.METATYPEs.keys())
 
-    @property
-    def TIMESTAMP(self):
-        return eKonf.Keys.TIMESTAMP.value
-
-    @property
-    def CORPUS(self):
-        return eKonf.Keys.CORPUS.value
-
     @property
     def METATYPEs(self):
         return self.INFO.get(eKonf.Keys.META)
@@ -11,7 +11,7 @@ log = logging.getLogger(__name__)
 
 class SummaryInfo:
     def __init__(self, **args):
-        self.args = eKonf.to_dict(args)
+        self.args = eKonf.to_config(args)
         self.name = self.args["name"]
         self.stat_args = self.args.get("stats", None)
         self.data_dir = self.args.get("data_dir", None)
@@ -1,9 +1,12 @@
 import logging
-import logging
 import os
-import pandas as pd
-from ekorpkit import eKonf
+from concurrent.futures import ThreadPoolExecutor
 
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datasets import load_dataset
+
+from ekorpkit import eKonf
 
 log = logging.getLogger(__name__)
 
@@ -18,6 +21,7 @@ class HFDS:
         self.verbose = self.args.get("verbose", True)
         self.download_mode = self.args.get("download_mode")
         self.ignore_verifications = self.args.get("ignore_verifications", True)
+        self.num_workers = self.args.get("num_workers", 1) or 1
 
         self.output_dir = self.args.output_dir
         os.makedirs(self.output_dir, exist_ok=True)
@@ -34,9 +38,6 @@ class HFDS:
             log.info(f"{self.output_file} already exists. skipping..")
 
     def build_hfds(self):
-        from datasets import load_dataset
-
-        dataset_name = self.name
         subsets = self.subsets
         splits = self.splits
         if isinstance(subsets, str):
@@ -48,24 +49,54 @@ class HFDS:
         elif not isinstance(splits, list):
             subsets = [None]
 
-        dfs = []
-        for subset in subsets:
-            for split in splits:
-                ds = load_dataset(
-                    dataset_name,
-                    subset,
-                    split=split,
-                    download_mode=self.download_mode,
-                    ignore_verifications=self.ignore_verifications,
-                )
-                print(ds)
-                df = ds.to_pandas()
-                df["subset"] = subset
-                df[eKonf.Keys.SPLIT] = split
-                dfs.append(df)
+        jobs = [(subset, split) for subset in subsets for split in splits]
+        num_workers = min(self.num_workers, len(jobs))
+        if num_workers > 1:
+            # load_dataset is mostly network/disk bound, and every subset and
+            # split has its own cache entry, so the loads can overlap. No worker
+            # processes are forked from these threads, as that can deadlock.
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                tables = list(executor.map(lambda job: self._load_table(*job), jobs))
+        else:
+            num_proc = self.num_workers if self.num_workers > 1 else None
+            tables = [
+                self._load_table(subset, split, num_proc=num_proc)
+                for subset, split in jobs
+            ]
 
-        df = pd.concat(dfs, ignore_index=True)
-        eKonf.save_data(df, self.output_file)
+        table = pa.concat_tables(tables, promote=True)
+        del tables
+        num_rows = table.num_rows
+        if self.output_file.endswith(".parquet"):
+            pq.write_table(table, self.output_file)
+            df = table.slice(max(num_rows - 5, 0)).to_pandas()
+        else:
+            # split_blocks skips consolidating columns into 2-D blocks, which
+            # would otherwise copy every column once more
+            df = table.to_pandas(split_blocks=True)
+            del table
+            eKonf.save_data(df, self.output_file)
         if self.verbose:
             print(df.tail())
-        log.info(f"Saved {len(df.index)} documents to {self.output_file}")
+        log.info(f"Saved {num_rows} documents to {self.output_file}")
+
+    def _load_table(self, subset, split, num_proc=None):
+        ds = load_dataset(
+            self.name,
+            subset,
+            split=split,
+            download_mode=self.download_mode,
+            ignore_verifications=self.ignore_verifications,
+            num_proc=num_proc,
+        )
+        log.info(f"Loaded {ds}")
+        # work on the underlying arrow table to avoid a pandas copy per split
+        table = ds.data.table
+        table = table.append_column(
+            "subset", pa.array([subset] * ds.num_rows, type=pa.string())
+        )
+        table = table.append_column(
+            eKonf.Keys.SPLIT.value,
+            pa.array([split] * ds.num_rows, type=pa.string()),
+        )
+        return table
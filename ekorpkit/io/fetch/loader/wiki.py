@@ -14,7 +14,8 @@ class Wiki:
         cfg.lang = lang
         if output_dir:
             cfg.output_dir = output_dir
-        self.args = eKonf.merge(cfg, args)
+        # args may hold the caller's config nodes, so only they are copied
+        self.args = eKonf.unsafe_merge(cfg, eKonf.to_config(args))
         self.name = self.args.name
         self.autoload = self.args.get("autoload", True)
         self.url = self.args.dump.url
@@ -1,3 +1,5 @@
+import copy
+import functools
 import logging
 import torch
 from pathlib import Path
@@ -13,6 +15,38 @@ from transformers import (
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4)
+def _load_pretrained_config(name_or_path, cache_dir, revision, use_auth_token):
+    return AutoConfig.from_pretrained(
+        name_or_path,
+        cache_dir=cache_dir,
+        revision=revision,
+        use_auth_token=use_auth_token,
+    )
+
+
+def load_pretrained_config(name_or_path, cache_dir, revision, use_auth_token):
+    """Load a pretrained config, reusing earlier loads of hub configs.
+
+    Configs in local directories are always read again, as they may have been
+    overwritten by training. A copy is returned as callers update the config.
+    """
+    if Path(name_or_path).is_dir():
+        return AutoConfig.from_pretrained(
+            name_or_path,
+            cache_dir=cache_dir,
+            revision=revision,
+            use_auth_token=use_auth_token,
+        )
+    config = _load_pretrained_config(name_or_path, cache_dir, revision, use_auth_token)
+    return copy.deepcopy(config)
+
+
+def clear_pretrained_config_cache():
+    """Forget the hub configs loaded by load_pretrained_config."""
+    _load_pretrained_config.cache_clear()
+
+
 class ColumnConfig(BaseModel):
     train: DictConfig = None
     predict: DictConfig = None
@@ -246,11 +280,9 @@ class ModelConfig(BaseModel):
             "use_auth_token": self.use_auth_token,
         }
         if self.config_name:
-            config = AutoConfig.from_pretrained(self.config_name, **config_kwargs)
+            config = load_pretrained_config(self.config_name, **config_kwargs)
         elif self.model_name_or_path:
-            config = AutoConfig.from_pretrained(
-                self.model_name_or_path, **config_kwargs
-            )
+            config = load_pretrained_config(self.model_name_or_path, **config_kwargs)
         else:
             config = CONFIG_MAPPING[self.model_type]()
             logger.warning("You are instantiating a new config instance from scratch.")
@@ -264,6 +296,38 @@ class ModelConfig(BaseModel):
 
 class ClassificationModelConfig(ModelConfig):
     num_labels: int = None
+    backend: str = Field(
+        default="torch",
+        description=(
+            "Inference backend for the trained model: torch, onnx or bettertransformer. "
+            "onnx exports the model with onnxruntime once and reuses the export."
+        ),
+    )
+    onnx_dirname: str = Field(
+        default="onnx",
+        description="Subdirectory of the model directory to store the onnx export in.",
+    )
+    precision: Optional[str] = Field(
+        default=None,
+        description=(
+            "Cast the loaded model to fp16 or bf16 for inference on cuda. "
+            "The logits are returned in float32. bf16 needs an Ampere or newer GPU."
+        ),
+    )
+    thread_count: Optional[int] = Field(
+        default=None,
+        description=(
+            "Number of torch threads to use for inference on cpu. "
+            "Defaults to the thread count saved with the trained model."
+        ),
+    )
+    predict_bucket_size: Optional[int] = Field(
+        default=None,
+        description=(
+            "If set, inputs are sorted by length and predicted in buckets of this size, "
+            "so short texts are not padded to the longest text in the whole input."
+        ),
+    )
 
 
 class ClassificationTrainerConfig(TrainerConfig):
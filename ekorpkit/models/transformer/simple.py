@@ -1,15 +1,14 @@
 import pandas as pd
 import logging
-import sklearn
 import numpy as np
-from typing import Tuple
+from pathlib import Path
+from typing import TYPE_CHECKING, Tuple
 from scipy.special import softmax
-from simpletransformers.classification import ClassificationModel
 from abc import abstractmethod
 from ekorpkit import eKonf
 from hyfi.config import BaseBatchModel
 from ekorpkit.datasets.config import DataframeConfig
-from ekorpkit.base import _Keys as Keys
+from ekorpkit.ekonf import _Keys as Keys
 from .config import (
     ColumnConfig,
     ModelBatchConfig,
@@ -19,8 +18,90 @@ from .config import (
     ClassificationTrainerConfig,
 )
 
+if TYPE_CHECKING:
+    from simpletransformers.classification import ClassificationModel
+
 log = logging.getLogger(__name__)
 
+def _float32_outputs(module, inputs, outputs):
+    import torch
+
+    # simpletransformers converts the logits with .numpy(), which has no bfloat16
+    if isinstance(outputs, tuple):
+        return tuple(
+            o.float() if torch.is_tensor(o) and o.is_floating_point() else o
+            for o in outputs
+        )
+    for key, value in list(outputs.items()):
+        if torch.is_tensor(value) and value.is_floating_point():
+            outputs[key] = value.float()
+    return outputs
+
+
+def _cast_to_precision(module, precision):
+    """Cast the weights of module to precision, keeping its outputs in float32."""
+    import torch
+
+    precision_dtypes = {"fp16": torch.float16, "bf16": torch.bfloat16}
+    if precision not in precision_dtypes:
+        raise ValueError(f"precision {precision} not supported")
+    module = module.to(precision_dtypes[precision])
+    module.register_forward_hook(_float32_outputs)
+    return module
+
+
+class _FoldParquetWriter:
+    """Append the prediction frames of cv folds to a single parquet file.
+
+    The schema is fixed by the first fold, with the types of the data columns
+    taken from the full data, so that a column that is all null in one fold,
+    or an int column that is float in the full data, fits every fold.
+    """
+
+    def __init__(self, path, data: pd.DataFrame):
+        self.path = path
+        self.data = data
+        self.schema = None
+        self.writer = None
+
+    def _fold_schema(self, fold: pd.DataFrame):
+        import pyarrow as pa
+
+        schema = pa.Schema.from_pandas(fold, preserve_index=False)
+        for col in fold.columns:
+            if col not in self.data.columns:
+                continue
+            idx = schema.get_field_index(col)
+            field = schema.field(idx)
+            dtype = self.data[col].dtype
+            if dtype == object:
+                if not pa.types.is_null(field.type):
+                    continue
+                # the fold has only nulls, infer the type from the full column
+                col_type = pa.array(self.data[col], from_pandas=True).type
+            else:
+                try:
+                    col_type = pa.from_numpy_dtype(dtype)
+                except (TypeError, NotImplementedError, pa.ArrowNotImplementedError):
+                    continue
+            schema = schema.set(idx, field.with_type(col_type))
+        return schema
+
+    def write(self, fold: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            self.schema = self._fold_schema(fold)
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        # the folds are consecutive slices of the data, so the index is not stored
+        table = pa.Table.from_pandas(fold, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
 
 class SimpleTrainer(BaseBatchModel):
     batch: ModelBatchConfig = None
@@ -39,12 +120,14 @@ class SimpleTrainer(BaseBatchModel):
 
     def initialize_configs(self, **args):
         super().initialize_configs(batch_config_class=ModelBatchConfig, **args)
-        if self.secrets.HUGGING_FACE_HUB_TOKEN:
-            hf_token = self.secrets.HUGGING_FACE_HUB_TOKEN.get_secret_value()
+        # each access to `secrets` builds and validates a new settings object
+        secrets = self.secrets
+        if secrets.HUGGING_FACE_HUB_TOKEN:
+            hf_token = secrets.HUGGING_FACE_HUB_TOKEN.get_secret_value()
         else:
             hf_token = None
-        if self.secrets.WANDB_API_KEY:
-            wandb_token = self.secrets.WANDB_API_KEY.get_secret_value()
+        if secrets.WANDB_API_KEY:
+            wandb_token = secrets.WANDB_API_KEY.get_secret_value()
         else:
             wandb_token = None
 
@@ -79,7 +162,7 @@ class SimpleTrainer(BaseBatchModel):
         return self.dataset.datasets
 
     @property
-    def model_obj(self) -> ClassificationModel:
+    def model_obj(self) -> "ClassificationModel":
         if self.__model_obj__ is None:
             self.load_model()
         return self.__model_obj__
@@ -133,9 +216,11 @@ class SimpleTrainer(BaseBatchModel):
             for key, name in columns.items()
             if name and name != key and name in data.columns
         }
-        if renames:
-            log.info(f"Renaming columns: {renames}")
-            data = data.copy().rename(columns=renames)
+        if not renames:
+            return data
+        log.info("Renaming columns: %s", renames)
+        # rename returns a new frame, no need to copy the data first
+        data = data.rename(columns=renames, copy=False)
         if self.verbose:
             print(data.head())
         return data
@@ -148,14 +233,24 @@ class SimpleTrainer(BaseBatchModel):
         return data_to_predict
 
     def append_predictions(self, data, preds):
-        predicted_column = self.columns.predict[Keys.PREDICTED]
-        model_outputs_column = self.columns.predict[Keys.MODEL_OUTPUTS]
-        data[predicted_column] = preds[Keys.PREDICTED]
-        data[model_outputs_column] = preds[Keys.MODEL_OUTPUTS]
+        columns = {self.columns.predict[Keys.PREDICTED]: preds[Keys.PREDICTED]}
+        model_outputs_column = self.columns.predict.get(Keys.MODEL_OUTPUTS)
+        if model_outputs_column:
+            columns[model_outputs_column] = preds[Keys.MODEL_OUTPUTS]
         pred_probs_column = self.columns.predict.get(Keys.PRED_PROBS)
         if pred_probs_column:
-            data[pred_probs_column] = preds[Keys.PRED_PROBS]
-        return data
+            columns[pred_probs_column] = preds[Keys.PRED_PROBS]
+        label_probs_prefix = self.columns.predict.get(Keys.LABEL_PROBS)
+        if label_probs_prefix:
+            for label, probs in preds[Keys.LABEL_PROBS].items():
+                columns[f"{label_probs_prefix}{label}"] = probs
+        # assemble the prediction columns once and join them in a single step
+        # instead of inserting them into the frame one by one
+        preds_df = pd.DataFrame(columns, index=data.index)
+        existing = [col for col in preds_df.columns if col in data.columns]
+        if existing:
+            data = data.drop(columns=existing)
+        return pd.concat([data, preds_df], axis=1, copy=False)
 
     def preds_path(self, preds_file=None):
         if preds_file is None:
@@ -188,15 +283,38 @@ class SimpleTrainer(BaseBatchModel):
         splits = self.dataset.cross_val_datasets(
             cv=cv, dev_size=dev_size, random_state=random_state, shuffle=shuffle
         )
+        cv_path = self.cv_path(cv_file)
+        stream = cv_path.endswith(".parquet")
+        writer = None
         pred_dfs = []
-        for split_no, split in splits:
-            self.train()
-            log.info(f"Predicting split {split_no}")
-            pred_df = self.predict(split)
-            pred_dfs.append(pred_df)
-        cv_preds = pd.concat(pred_dfs)
-        eKonf.save_data(cv_preds, self.cv_path(cv_file))
-        return cv_preds
+        try:
+            for split_no, split in splits:
+                self.train()
+                log.info(f"Predicting split {split_no}")
+                # only the combined cv predictions are saved, not every fold
+                preds = self.predict_data(self.convert_to_predict(split))
+                pred_df = self.append_predictions(split, preds)
+                # drop this fold's model so the next fold predicts with its own
+                # and its weights are not held on the device while training
+                self.__model_obj__ = None
+                self.reset()
+                if stream:
+                    # append each fold to the parquet file as it finishes
+                    # instead of concatenating all folds in memory
+                    if writer is None:
+                        writer = _FoldParquetWriter(cv_path, self.dataset.data)
+                    writer.write(pred_df)
+                else:
+                    pred_dfs.append(pred_df)
+        finally:
+            if writer is not None:
+                writer.close()
+        if not stream:
+            cv_preds = pd.concat(pred_dfs)
+            eKonf.save_data(cv_preds, cv_path)
+            return cv_preds
+        log.info(f"Saved cv predictions to {cv_path}")
+        return eKonf.load_data(cv_path)
 
 
 class SimpleClassification(SimpleTrainer):
@@ -216,6 +334,10 @@ class SimpleClassification(SimpleTrainer):
         return self.model_obj.args.labels_map
 
     def train(self):
+        # simpletransformers and sklearn are slow to import, load them on use
+        import sklearn.metrics
+        from simpletransformers.classification import ClassificationModel
+
         self.reset()
         self.load_config()
 
@@ -253,29 +375,124 @@ class SimpleClassification(SimpleTrainer):
         self.reset()
 
     def load_model(self, model_dir=None):
+        from simpletransformers.classification import ClassificationModel
 
         if model_dir is None:
             model_dir = self.trainer.best_model_dir
             if not eKonf.exists(model_dir):
                 model_dir = self.trainer.output_dir
 
-        self.__model_obj__ = ClassificationModel(self.model.model_type, model_dir)
-        # , args=self._model_cfg
-        log.info(f"Loaded model from {model_dir}")
+        backend = self.model.backend
+        if backend == "onnx":
+            model = self._load_onnx_model(model_dir)
+        elif backend in ("torch", "bettertransformer"):
+            model = ClassificationModel(
+                self.model.model_type, model_dir, args=self._inference_args()
+            )
+            if backend == "bettertransformer":
+                try:
+                    from optimum.bettertransformer import BetterTransformer
+                except ImportError:
+                    raise ImportError(
+                        "\n"
+                        "You must install `optimum` if you want to use `bettertransformer` backend.\n"
+                        "Please install using `pip install optimum`.\n"
+                    )
+                model.model = BetterTransformer.transform(model.model)
+        else:
+            raise ValueError(f"backend {backend} not supported")
+        precision = self.model.precision
+        if precision and backend != "onnx" and model.device.type == "cuda":
+            model.model = _cast_to_precision(model.model, precision)
+            log.info(f"Cast model to {precision}")
+        self.__model_obj__ = model
+        log.info(f"Loaded model from {model_dir} with {backend} backend")
+
+    def _load_onnx_model(self, model_dir):
+        from simpletransformers.classification import ClassificationModel
+
+        onnx_dir = str(Path(model_dir) / self.model.onnx_dirname)
+        if not eKonf.exists(onnx_dir):
+            log.info(f"Exporting model to onnx: {onnx_dir}")
+            model = ClassificationModel(self.model.model_type, model_dir)
+            model.convert_to_onnx(onnx_dir)
+            del model
+        # simpletransformers runs the exported model with onnxruntime sessions
+        return ClassificationModel(
+            self.model.model_type,
+            onnx_dir,
+            use_cuda=self.model.use_cuda,
+            cuda_device=self.model.cuda_device,
+            args=self._inference_args(),
+        )
+
+    def _inference_args(self):
+        # simpletransformers calls torch.set_num_threads with thread_count
+        args = {}
+        if self.model.thread_count:
+            args["thread_count"] = self.model.thread_count
+        return args
 
     def predict_data(self, data: list):
-        predictions, raw_outputs = self.model_obj.predict(data)
+        import torch
+
+        # predict only wraps the forward pass in no_grad; inference_mode also
+        # skips autograd's version counting and view tracking
+        with torch.inference_mode():
+            predictions, raw_outputs = self._predict_in_buckets(data)
         log.info(f"type of raw_outputs: {type(raw_outputs)}")
-        prob_outputs = [softmax(output.flatten().tolist()) for output in raw_outputs]
-        model_outputs = [dict(zip(self.labels_list, output)) for output in prob_outputs]
-        pred_probs = [output.max() for output in prob_outputs]
+        # float32 is plenty for probabilities and halves what is written out
+        raw = np.asarray(raw_outputs, dtype=np.float32)
+        raw = raw.reshape(raw.shape[0], -1)
+        # the top probability straight from the logits: 1 / sum(exp(x - max(x)))
+        shifted = raw - raw.max(axis=1, keepdims=True)
+        pred_probs = (1.0 / np.exp(shifted).sum(axis=1)).tolist()
+        model_outputs = None
+        label_probs = None
+        with_model_outputs = self.columns.predict.get(Keys.MODEL_OUTPUTS)
+        with_label_probs = self.columns.predict.get(Keys.LABEL_PROBS)
+        if with_model_outputs or with_label_probs:
+            prob_outputs = softmax(raw, axis=1)
+            labels_list = self.labels_list
+            if with_model_outputs:
+                model_outputs = [
+                    dict(zip(labels_list, output)) for output in prob_outputs
+                ]
+            if with_label_probs:
+                # one float32 array per label instead of a dict per row
+                label_probs = {
+                    label: prob_outputs[:, i] for i, label in enumerate(labels_list)
+                }
         log.info(f"raw_output: {raw_outputs[0]}")
         return {
             Keys.PREDICTED.value: predictions,
             Keys.PRED_PROBS.value: pred_probs,
             Keys.MODEL_OUTPUTS.value: model_outputs,
+            Keys.LABEL_PROBS.value: label_probs,
         }
 
+    def _predict_in_buckets(self, data: list):
+        model_obj = self.model_obj
+        bucket_size = self.model.predict_bucket_size
+        if not bucket_size or len(data) <= bucket_size:
+            return model_obj.predict(data)
+
+        # character length is a cheap stand-in for the token length here
+        order = np.argsort([len(str(text)) for text in data], kind="stable")
+        predictions, raw_outputs = [], []
+        for start in range(0, len(order), bucket_size):
+            bucket = [data[i] for i in order[start : start + bucket_size]]
+            preds, raws = model_obj.predict(bucket)
+            predictions.extend(preds)
+            raw_outputs.extend(raws)
+
+        # restore the input order
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        predictions = [predictions[i] for i in inverse]
+        raw_outputs = np.stack(raw_outputs)[inverse]
+        return predictions, raw_outputs
+
     def eval_figure_file(self, figure_file=None):
         if figure_file is None:
             figure_file = self.model.eval.output_file
@@ -1,12 +1,12 @@
+import json
 import logging
 import math
 import os
-import random
-from itertools import chain
+import re
 from pathlib import Path
 
 import datasets
-import evaluate
+import numpy as np
 import torch
 import transformers
 from accelerate import Accelerator
@@ -21,12 +21,16 @@ from transformers import (
     is_torch_tpu_available,
     set_seed,
 )
-from transformers.trainer_utils import get_last_checkpoint
+from transformers.trainer_utils import PREFIX_CHECKPOINT_DIR
 from transformers.utils import check_min_version
 from transformers.utils.versions import require_version
 
 from ekorpkit import eKonf
-from ekorpkit.tokenizers.config import TokenizerConfig
+from ekorpkit.models.transformer.config import clear_pretrained_config_cache
+from ekorpkit.tokenizers.config import (
+    TokenizerConfig,
+    clear_pretrained_tokenizer_cache,
+)
 
 from .config import LM_MAPPING, LMModelConfig, LMTrainingDatasetConfig
 
@@ -40,6 +44,146 @@ require_version(
 
 logger = logging.getLogger(__name__)
 
+_TOKENIZED_CACHE_SETTINGS_FILE = "tokenization_settings.json"
+_RE_CHECKPOINT = re.compile(r"^" + PREFIX_CHECKPOINT_DIR + r"\-(\d+)$")
+
+
+def _scan_output_dir(output_dir):
+    """Return the last checkpoint in output_dir and whether the directory is empty,
+    with a single directory scan."""
+    with os.scandir(output_dir) as it:
+        entries = list(it)
+    checkpoints = [
+        entry
+        for entry in entries
+        if _RE_CHECKPOINT.match(entry.name) is not None and entry.is_dir()
+    ]
+    if not checkpoints:
+        return None, not entries
+    last = max(checkpoints, key=lambda e: int(_RE_CHECKPOINT.match(e.name).group(1)))
+    return last.path, False
+
+
+def _load_tokenized_cache(cache_dir, settings):
+    """Load the tokenized datasets saved in cache_dir, if they were saved with the same
+    tokenization settings."""
+    settings_file = Path(cache_dir) / _TOKENIZED_CACHE_SETTINGS_FILE
+    if not settings_file.is_file():
+        if Path(cache_dir).is_dir():
+            logger.warning(f"No tokenization settings in {cache_dir}, tokenizing again")
+        return None
+    with open(settings_file) as f:
+        cached_settings = json.load(f)
+    # compare as saved, e.g. with paths as strings
+    settings = json.loads(json.dumps(settings, default=str))
+    if cached_settings != settings:
+        changed = sorted(
+            k
+            for k in set(settings) | set(cached_settings)
+            if settings.get(k) != cached_settings.get(k)
+        )
+        logger.warning(
+            f"Tokenized datasets in {cache_dir} were saved with other settings "
+            f"({', '.join(changed)}), tokenizing again"
+        )
+        return None
+    logger.info(f"Loading tokenized datasets from {cache_dir}")
+    return datasets.load_from_disk(cache_dir)
+
+
+def _save_tokenized_cache(tokenized_datasets, cache_dir, settings):
+    logger.info(f"Saving tokenized datasets to {cache_dir}")
+    settings_file = Path(cache_dir) / _TOKENIZED_CACHE_SETTINGS_FILE
+    # an interrupted save must not leave the previous settings behind
+    if settings_file.is_file():
+        settings_file.unlink()
+    tokenized_datasets.save_to_disk(cache_dir)
+    with open(settings_file, "w") as f:
+        json.dump(settings, f, indent=2, default=str)
+
+
+def _group_texts(
+    examples, max_seq_length, ids_dtype=np.int32, shuffle=False, with_labels=False
+):
+    """Concatenate the tokenized texts of a batch and split them into chunks of
+    max_seq_length, dropping the remainder."""
+    if shuffle:
+        # Shuffle the order of the lines with one permutation for all keys,
+        # so input_ids stay aligned with the masks
+        perm = np.random.permutation(len(examples["input_ids"]))
+        examples = {k: [v[i] for i in perm] for k, v in examples.items()}
+    # Concatenate all texts into flat int16/int32 arrays.
+    concatenated_examples = {
+        k: np.concatenate([np.asarray(t, dtype=ids_dtype) for t in v])
+        if len(v) > 0
+        else np.zeros(0, dtype=ids_dtype)
+        for k, v in examples.items()
+    }
+    total_length = len(concatenated_examples[list(examples.keys())[0]])
+    # We drop the small remainder, we could add padding if the model supported it instead of this drop,
+    # you can customize this part to your needs.
+    num_chunks = total_length // max_seq_length
+    if num_chunks > 0:
+        # Split by chunks of max_len with a reshape instead of slicing lists.
+        total_length = num_chunks * max_seq_length
+        result = {
+            k: t[:total_length].reshape(num_chunks, max_seq_length)
+            for k, t in concatenated_examples.items()
+        }
+    else:
+        # Less than one chunk of text is kept as a single short chunk.
+        result = {
+            k: [t] if total_length > 0 else [] for k, t in concatenated_examples.items()
+        }
+    if with_labels:
+        # the rows are copied when written to arrow, so no copy is needed here
+        result["labels"] = result["input_ids"]
+    return result
+
+
+# values of the other columns for an inserted separator token
+_SEP_VALUES = {
+    "attention_mask": 1,
+    "special_tokens_mask": 1,
+    "token_type_ids": 0,
+}
+
+
+def _pack_sequences(examples, max_seq_length, sep_token_id=None):
+    """Pack whole tokenized texts into sequences of up to max_seq_length, starting a
+    new sequence whenever the next text would not fit, so that little is lost to
+    padding. Texts are separated by sep_token_id, and longer texts are split."""
+    keys = list(examples.keys())
+    sep_values = {**_SEP_VALUES, "input_ids": sep_token_id}
+    result = {k: [] for k in keys}
+    current = {k: [] for k in keys}
+    for i, input_ids in enumerate(examples["input_ids"]):
+        if not input_ids:
+            continue
+        text = {k: list(examples[k][i]) for k in keys}
+        if sep_token_id is not None and input_ids[-1] != sep_token_id:
+            for k in keys:
+                text[k].append(sep_values.get(k, 0))
+        # texts longer than max_seq_length are split into several pieces
+        for start in range(0, len(text["input_ids"]), max_seq_length):
+            piece = {k: v[start : start + max_seq_length] for k, v in text.items()}
+            if len(current["input_ids"]) + len(piece["input_ids"]) > max_seq_length:
+                for k in keys:
+                    result[k].append(current[k])
+                current = {k: [] for k in keys}
+            for k in keys:
+                current[k].extend(piece[k])
+    if current["input_ids"]:
+        for k in keys:
+            result[k].append(current[k])
+    return result
+
+
+def _take_samples(dataset, max_samples):
+    if isinstance(dataset, datasets.IterableDataset):
+        return dataset.take(max_samples)
+    return dataset.select(range(min(len(dataset), max_samples)))
+
 
 class BaseLMTrainer(BaseBatchModel):
     model: LMModelConfig = None
@@ -49,6 +193,7 @@ class BaseLMTrainer(BaseBatchModel):
     use_accelerator: bool = False
     last_checkpoint: str = None
     __tokenized_datasets__ = None
+    __configs_initialized__ = False
 
     def __init__(self, config_name: str = None, config_group: str = None, **args):
         super().__init__(config_name=config_name, config_group=config_group, **args)
@@ -59,7 +204,10 @@ class BaseLMTrainer(BaseBatchModel):
     def _check_trainer(cls, v):
         return None
 
-    def initialize_configs(self, **args):
+    def initialize_configs(self, force=False, **args):
+        # the configs only change with new arguments, or after a reset
+        if self.__configs_initialized__ and not force and not args:
+            return
         super().initialize_configs(**args)
         hf_token = self.secrets.HUGGING_FACE_HUB_TOKEN.get_secret_value()
 
@@ -70,13 +218,16 @@ class BaseLMTrainer(BaseBatchModel):
         self.tokenizer.initialize_config(self.model, self.dataset, self.root_dir)
 
         if self.trainer is None:
-            training_args = TrainingArguments(**eKonf.to_dict(self.config.trainer))
+            trainer_args = eKonf.to_dict(self.config.trainer)
+            training_args = TrainingArguments(**trainer_args)
+            self._init_dataloader_settings(training_args, trainer_args)
         else:
             training_args = self.trainer
         training_args.output_dir = self.model.model_output_dir
         training_args.seed = self.seed
         training_args.hub_token = hf_token
         self.trainer = training_args
+        self.__configs_initialized__ = True
 
     def _init_env(self):
         training_args = self.trainer
@@ -105,11 +256,8 @@ class BaseLMTrainer(BaseBatchModel):
             and training_args.do_train
             and not training_args.overwrite_output_dir
         ):
-            last_checkpoint = get_last_checkpoint(training_args.output_dir)
-            if (
-                last_checkpoint is None
-                and len(os.listdir(training_args.output_dir)) > 0
-            ):
+            last_checkpoint, is_empty = _scan_output_dir(training_args.output_dir)
+            if last_checkpoint is None and not is_empty:
                 raise ValueError(
                     f"Output directory ({training_args.output_dir}) already exists and is not empty. "
                     "Use --overwrite_output_dir to overcome."
@@ -176,10 +324,14 @@ class BaseLMTrainer(BaseBatchModel):
         data_args = self.dataset
         model_args = self.model
         training_args = self.trainer
-        raw_datasets = self.raw_datasets
-        column_names = raw_datasets["train"].column_names
-        text_column_name = self.dataset.text_column_name
+
         tokenizer = self.tokenizer_obj
+        if not tokenizer.is_fast:
+            logger.warning(
+                f"{type(tokenizer).__name__} is not a fast tokenizer. Tokenizing with a "
+                "fast (Rust) tokenizer is much quicker; set use_fast_tokenizer or "
+                "convert the tokenizer if one is available."
+            )
 
         if data_args.max_seq_length is None:
             max_seq_length = tokenizer.model_max_length
@@ -196,10 +348,46 @@ class BaseLMTrainer(BaseBatchModel):
                     f"model ({tokenizer.model_max_length}). Using max_seq_length={tokenizer.model_max_length}."
                 )
             max_seq_length = min(data_args.max_seq_length, tokenizer.model_max_length)
+
+        # streamed datasets are mapped lazily and cannot be saved to disk
+        cache_dir = None if data_args.streaming else data_args.tokenized_cache_dir
+        if cache_dir:
+            cache_settings = self._tokenized_cache_settings(tokenizer, max_seq_length)
+            if not data_args.overwrite_cache:
+                tokenized_datasets = _load_tokenized_cache(cache_dir, cache_settings)
+                if tokenized_datasets is not None:
+                    self.__tokenized_datasets__ = tokenized_datasets
+                    return
+
+        raw_datasets = self.raw_datasets
+        text_column_name = self.dataset.text_column_name
+        column_names = raw_datasets["train"].column_names or [text_column_name]
         return_special_tokens_mask = data_args.return_special_tokens_mask
         affix_bos_eos_to_sentences = data_args.affix_bos_eos_to_sentences
-        bos_token = self.tokenizer.bos_token
-        eos_token = self.tokenizer.eos_token
+        prefix = f"{self.tokenizer.bos_token} "
+        suffix = f" {self.tokenizer.eos_token}"
+
+        def clean_lines(lines):
+            # drop empty lines, and affix the bos and eos tokens if requested
+            if affix_bos_eos_to_sentences:
+                return [
+                    prefix + line + suffix
+                    for line in lines
+                    if line and not line.isspace()
+                ]
+            return [line for line in lines if line and not line.isspace()]
+
+        def map_kwargs(desc):
+            kwargs = {"batched": True, "batch_size": data_args.preprocessing_batch_size}
+            # streamed datasets are mapped on the fly, without worker processes or cache files
+            if not data_args.streaming:
+                kwargs.update(
+                    writer_batch_size=data_args.writer_batch_size,
+                    num_proc=data_args.num_workers,
+                    load_from_cache_file=not data_args.overwrite_cache,
+                    desc=desc,
+                )
+            return kwargs
 
         if data_args.line_by_line:
             # When using line_by_line, we just tokenize each nonempty line.
@@ -207,16 +395,10 @@ class BaseLMTrainer(BaseBatchModel):
 
             def tokenize_function(examples):
                 # Remove empty lines
-                examples[text_column_name] = [
-                    line
-                    if not affix_bos_eos_to_sentences
-                    else f"{bos_token} {line} {eos_token}"
-                    for line in examples[text_column_name]
-                    if len(line) > 0 and not line.isspace()
-                ]
+                lines = clean_lines(examples[text_column_name])
                 # Tokenize lines
                 return tokenizer(
-                    examples[text_column_name],
+                    lines,
                     padding=padding,
                     truncation=True,
                     max_length=max_seq_length,
@@ -228,67 +410,52 @@ class BaseLMTrainer(BaseBatchModel):
             with training_args.main_process_first(desc="dataset map tokenization"):
                 tokenized_datasets = raw_datasets.map(
                     tokenize_function,
-                    batched=True,
-                    num_proc=data_args.num_workers,
                     remove_columns=[text_column_name],
-                    load_from_cache_file=not data_args.overwrite_cache,
-                    desc="Running tokenizer on dataset line_by_line",
+                    **map_kwargs("Running tokenizer on dataset line_by_line"),
                 )
         else:
             # Otherwise, we tokenize every text, then concatenate them together before splitting them in smaller parts.
             # We use `return_special_tokens_mask=True` because DataCollatorForLanguageModeling (see below) is more
             # efficient when it receives the `special_tokens_mask`.
             group_by_shuffling = data_args.group_by_shuffling
+            # Store the grouped token ids as int16 when the vocabulary fits, int32 otherwise,
+            # instead of the default int64. They are converted back to long when collated.
+            ids_dtype = (
+                np.int16 if len(tokenizer) <= np.iinfo(np.int16).max + 1 else np.int32
+            )
 
             def tokenize_function(examples):
-                examples[text_column_name] = [
-                    line
-                    if not affix_bos_eos_to_sentences
-                    else f"{bos_token} {line} {eos_token}"
-                    for line in examples[text_column_name]
-                    if len(line) > 0 and not line.isspace()
-                ]
                 return tokenizer(
-                    examples[text_column_name],
+                    clean_lines(examples[text_column_name]),
                     return_special_tokens_mask=return_special_tokens_mask,
                 )
 
             with training_args.main_process_first(desc="dataset map tokenization"):
                 tokenized_datasets = raw_datasets.map(
                     tokenize_function,
-                    batched=True,
-                    num_proc=data_args.num_workers,
                     remove_columns=column_names,
-                    load_from_cache_file=not data_args.overwrite_cache,
-                    desc="Running tokenizer on every text in dataset",
+                    **map_kwargs("Running tokenizer on every text in dataset"),
                 )
 
             # Main data processing function that will concatenate all texts from our dataset and generate chunks of
             # max_seq_length.
             def group_texts(examples):
-                # Concatenate all texts.
-                concatenated_examples = {
-                    k: list(chain(*examples[k])) for k in examples.keys()
-                }
-                if group_by_shuffling:
-                    # Shuffle the order of concatenated examples
-                    random.shuffle(concatenated_examples["input_ids"])
-                total_length = len(concatenated_examples[list(examples.keys())[0]])
-                # We drop the small remainder, we could add padding if the model supported it instead of this drop,
-                # you can customize this part to your needs.
-                if total_length >= max_seq_length:
-                    total_length = (total_length // max_seq_length) * max_seq_length
-                # Split by chunks of max_len.
-                result = {
-                    k: [
-                        t[i : i + max_seq_length]
-                        for i in range(0, total_length, max_seq_length)
-                    ]
-                    for k, t in concatenated_examples.items()
-                }
-                if model_args.model_objective == "clm":
-                    result["labels"] = result["input_ids"].copy()
-                return result
+                return _group_texts(
+                    examples,
+                    max_seq_length,
+                    ids_dtype=ids_dtype,
+                    shuffle=group_by_shuffling,
+                    with_labels=model_args.model_objective == "clm",
+                )
+
+            sep_token_id = (
+                tokenizer.eos_token_id
+                if tokenizer.eos_token_id is not None
+                else tokenizer.sep_token_id
+            )
+
+            def pack_sequences(examples):
+                return _pack_sequences(examples, max_seq_length, sep_token_id)
 
             # Note that with `batched=True`, this map processes 1,000 texts together, so group_texts throws away a
             # remainder for each of those groups of 1,000 texts. You can adjust that batch_size here but a higher value
@@ -298,17 +465,49 @@ class BaseLMTrainer(BaseBatchModel):
             # See the documentation of the map method for more information:
             # https://huggingface.co/docs/datasets/package_reference/main_classes.html#datasets.Dataset.map
 
-            with training_args.main_process_first(desc="grouping texts together"):
-                tokenized_datasets = tokenized_datasets.map(
-                    group_texts,
-                    batched=True,
-                    num_proc=data_args.num_workers,
-                    load_from_cache_file=not data_args.overwrite_cache,
-                    desc=f"Grouping texts in chunks of {max_seq_length}",
-                )
-
+            if data_args.packing:
+                # The packed sequences vary in length, so the data collator pads them and builds
+                # the labels per batch.
+                with training_args.main_process_first(desc="packing texts together"):
+                    tokenized_datasets = tokenized_datasets.map(
+                        pack_sequences,
+                        **map_kwargs(f"Packing texts in sequences of {max_seq_length}"),
+                    )
+            else:
+                with training_args.main_process_first(desc="grouping texts together"):
+                    tokenized_datasets = tokenized_datasets.map(
+                        group_texts,
+                        **map_kwargs(f"Grouping texts in chunks of {max_seq_length}"),
+                    )
+
+        if cache_dir and training_args.should_save:
+            _save_tokenized_cache(tokenized_datasets, cache_dir, cache_settings)
         self.__tokenized_datasets__ = tokenized_datasets
 
+    def _tokenized_cache_settings(self, tokenizer, max_seq_length):
+        # everything that changes the token ids or the rows of the tokenized datasets
+        data_args = self.dataset
+        return {
+            "tokenizer": tokenizer.name_or_path,
+            "tokenizer_class": type(tokenizer).__name__,
+            "vocab_size": len(tokenizer),
+            "max_seq_length": max_seq_length,
+            "model_objective": self.model.model_objective,
+            "dataset_name": data_args.dataset_name,
+            "dataset_config_name": data_args.dataset_config_name,
+            "train_file": data_args.train_file,
+            "validation_file": data_args.validation_file,
+            "validation_split_percentage": data_args.validation_split_percentage,
+            "text_column_name": data_args.text_column_name,
+            "line_by_line": data_args.line_by_line,
+            "packing": data_args.packing,
+            "pad_to_max_length": data_args.pad_to_max_length,
+            "group_by_shuffling": data_args.group_by_shuffling,
+            "return_special_tokens_mask": data_args.return_special_tokens_mask,
+            "affix_bos_eos_to_sentences": data_args.affix_bos_eos_to_sentences,
+            "preprocessing_batch_size": data_args.preprocessing_batch_size,
+        }
+
     def train(self):
         self.reset()
         self.initialize_configs()
@@ -318,6 +517,8 @@ class BaseLMTrainer(BaseBatchModel):
         training_args = self.trainer
 
         tokenizer = self.tokenizer_obj
+        # The model is loaded before tokenizing, not alongside it, since both use the
+        # same fast tokenizer, which cannot be borrowed from two threads at once.
         model = self.model_obj
         tokenized_datasets = self.tokenized_datasets
         last_checkpoint = self.last_checkpoint
@@ -326,9 +527,12 @@ class BaseLMTrainer(BaseBatchModel):
             if "train" not in tokenized_datasets:
                 raise ValueError("do_train requires a train dataset")
             train_dataset = tokenized_datasets["train"]
+            if data_args.streaming and training_args.max_steps <= 0:
+                raise ValueError("Training on a streamed dataset requires max_steps")
             if data_args.max_train_samples is not None:
-                max_train_samples = min(len(train_dataset), data_args.max_train_samples)
-                train_dataset = train_dataset.select(range(max_train_samples))
+                train_dataset = _take_samples(
+                    train_dataset, data_args.max_train_samples
+                )
 
         if "validation" not in tokenized_datasets:
             training_args.do_eval = False
@@ -337,8 +541,7 @@ class BaseLMTrainer(BaseBatchModel):
             #     raise ValueError("do_eval requires a validation dataset")
             eval_dataset = tokenized_datasets["validation"]
             if data_args.max_eval_samples is not None:
-                max_eval_samples = min(len(eval_dataset), data_args.max_eval_samples)
-                eval_dataset = eval_dataset.select(range(max_eval_samples))
+                eval_dataset = _take_samples(eval_dataset, data_args.max_eval_samples)
 
             def preprocess_logits_for_metrics(logits, labels):
                 if isinstance(logits, tuple):
@@ -347,7 +550,13 @@ class BaseLMTrainer(BaseBatchModel):
                     logits = logits[0]
                 return logits.argmax(dim=-1)
 
-            metric = evaluate.load("accuracy")
+            # Accuracy is computed directly on the argmaxed predictions, ignoring the
+            # positions labelled -100, instead of a round trip through evaluate.
+            def accuracy(preds, labels):
+                mask = labels != -100
+                num_labels = mask.sum()
+                correct = ((preds == labels) & mask).sum()
+                return {"accuracy": float(correct / num_labels) if num_labels else 0.0}
 
             if model_args.model_objective == "mlm":
 
@@ -355,12 +564,7 @@ class BaseLMTrainer(BaseBatchModel):
                     preds, labels = eval_preds
                     # preds have the same shape as the labels, after the argmax(-1) has been calculated
                     # by preprocess_logits_for_metrics
-                    labels = labels.reshape(-1)
-                    preds = preds.reshape(-1)
-                    mask = labels != -100
-                    labels = labels[mask]
-                    preds = preds[mask]
-                    return metric.compute(predictions=preds, references=labels)
+                    return accuracy(preds, labels)
 
             else:
 
@@ -368,14 +572,17 @@ class BaseLMTrainer(BaseBatchModel):
                     preds, labels = eval_preds
                     # preds have the same shape as the labels, after the argmax(-1) has been calculated
                     # by preprocess_logits_for_metrics but we need to shift the labels
-                    labels = labels[:, 1:].reshape(-1)
-                    preds = preds[:, :-1].reshape(-1)
-                    return metric.compute(predictions=preds, references=labels)
+                    return accuracy(preds[:, :-1], labels[:, 1:])
 
         # Data collator
         # This one will take care of randomly masking the tokens.
+        if data_args.mlm and not data_args.return_special_tokens_mask:
+            logger.warning(
+                "return_special_tokens_mask is off, so the data collator has to rebuild "
+                "the special tokens mask row by row for every masked batch."
+            )
         pad_to_multiple_of_8 = (
-            data_args.line_by_line
+            (data_args.line_by_line or data_args.packing)
             and training_args.fp16
             and not data_args.pad_to_max_length
         )
@@ -386,7 +593,18 @@ class BaseLMTrainer(BaseBatchModel):
             pad_to_multiple_of=8 if pad_to_multiple_of_8 else None,
         )
 
+        if training_args.do_train:
+            self._init_memory_settings(model, training_args)
+
         torch.set_grad_enabled(True)
+        if (
+            training_args.tf32 is None
+            and torch.cuda.is_available()
+            and torch.cuda.get_device_capability()[0] >= 8
+        ):
+            # Use TF32 matmuls on Ampere or newer GPUs unless tf32 is set explicitly
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
         # Initialize our Trainer
         trainer = Trainer(
             model=model,
@@ -425,12 +643,13 @@ class BaseLMTrainer(BaseBatchModel):
             trainer.save_model()  # Saves the tokenizer too for easy upload
             metrics = train_result.metrics
 
-            max_train_samples = (
-                data_args.max_train_samples
-                if data_args.max_train_samples is not None
-                else len(train_dataset)
-            )
-            metrics["train_samples"] = min(max_train_samples, len(train_dataset))
+            if not data_args.streaming:
+                max_train_samples = (
+                    data_args.max_train_samples
+                    if data_args.max_train_samples is not None
+                    else len(train_dataset)
+                )
+                metrics["train_samples"] = min(max_train_samples, len(train_dataset))
 
             trainer.log_metrics("train", metrics)
             trainer.save_metrics("train", metrics)
@@ -442,17 +661,15 @@ class BaseLMTrainer(BaseBatchModel):
 
             metrics = trainer.evaluate()
 
-            max_eval_samples = (
-                data_args.max_eval_samples
-                if data_args.max_eval_samples is not None
-                else len(eval_dataset)
-            )
-            metrics["eval_samples"] = min(max_eval_samples, len(eval_dataset))
-            try:
-                perplexity = math.exp(metrics["eval_loss"])
-            except OverflowError:
-                perplexity = float("inf")
-            metrics["perplexity"] = perplexity
+            if not data_args.streaming:
+                max_eval_samples = (
+                    data_args.max_eval_samples
+                    if data_args.max_eval_samples is not None
+                    else len(eval_dataset)
+                )
+                metrics["eval_samples"] = min(max_eval_samples, len(eval_dataset))
+            # clip the loss so that a diverged model reports a large finite perplexity
+            metrics["perplexity"] = math.exp(min(metrics["eval_loss"], 50.0))
 
             trainer.log_metrics("eval", metrics)
             trainer.save_metrics("eval", metrics)
@@ -479,7 +696,57 @@ class BaseLMTrainer(BaseBatchModel):
         del trainer
         self.reset()
 
-    def reset(self):
+    def _init_dataloader_settings(self, training_args, trainer_args):
+        # Default the dataloader to a few persistent, prefetching worker processes,
+        # leaving anything set in the trainer config as is.
+        if "dataloader_num_workers" not in trainer_args:
+            num_cpus = (os.cpu_count() or 1) // training_args.world_size
+            training_args.dataloader_num_workers = min(4, num_cpus)
+        if training_args.dataloader_num_workers > 0:
+            # only available in newer versions of transformers
+            for key, value in [
+                ("dataloader_persistent_workers", True),
+                ("dataloader_prefetch_factor", 4),
+            ]:
+                if key not in trainer_args and hasattr(training_args, key):
+                    setattr(training_args, key, value)
+
+    def _init_memory_settings(self, model, training_args):
+        data_args = self.dataset
+        if data_args.effective_batch_size is not None:
+            per_step = (
+                training_args.per_device_train_batch_size * training_args.world_size
+            )
+            training_args.gradient_accumulation_steps = max(
+                1, data_args.effective_batch_size // per_step
+            )
+            logger.info(
+                f"Using {training_args.gradient_accumulation_steps} gradient accumulation steps "
+                f"for an effective batch size of {data_args.effective_batch_size}"
+            )
+
+        if (
+            training_args.gradient_checkpointing
+            or not torch.cuda.is_available()
+            or not getattr(model, "supports_gradient_checkpointing", False)
+        ):
+            return
+        # fp32 weights, gradients and two Adam moments take about 16 bytes per parameter
+        num_params = sum(p.numel() for p in model.parameters())
+        free_memory, _ = torch.cuda.mem_get_info()
+        if num_params * 16 > free_memory * 0.6:
+            logger.warning(
+                f"Model with {num_params:,} parameters is large for the free GPU memory "
+                f"({free_memory / 2**30:.1f} GiB), enabling gradient checkpointing"
+            )
+            training_args.gradient_checkpointing = True
+
+    def reset(self, objects=None, force_reload=False):
         # self.__tokenized_datasets__ = None
         # self.__model_obj__ = None
-        super().reset()
+        self.__configs_initialized__ = False
+        if force_reload:
+            # pretrained configs and tokenizers are cached across trainers
+            clear_pretrained_config_cache()
+            clear_pretrained_tokenizer_cache()
+        super().reset(objects)
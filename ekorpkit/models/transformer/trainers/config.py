@@ -150,6 +150,14 @@ class LMTrainingDatasetConfig(DatasetConfig):
             "Only relevant when line_by_line is False."
         ),
     )
+    packing: bool = Field(
+        default=False,
+        description=(
+            "Whether to pack whole tokenized texts into sequences of up to `max_seq_length`, "
+            "separated by the eos (or sep) token, instead of splitting the concatenated texts "
+            "into fixed-length chunks. Only relevant when line_by_line is False."
+        ),
+    )
     pad_to_max_length: bool = Field(
         default=False,
         description=(
@@ -168,4 +176,33 @@ class LMTrainingDatasetConfig(DatasetConfig):
             "Only relevant when line_by_line is True."
         ),
     )
+    preprocessing_batch_size: int = Field(
+        default=1000,
+        description=(
+            "Number of examples per batch passed to the tokenize and group functions. "
+            "Without line_by_line, the remainder of every batch is dropped when grouping."
+        ),
+    )
+    writer_batch_size: Optional[int] = Field(
+        default=1000,
+        description=(
+            "Number of rows per write to the cached Arrow files during preprocessing. "
+            "Larger values mean fewer, larger writes at the cost of memory."
+        ),
+    )
+    effective_batch_size: Optional[int] = Field(
+        default=None,
+        description=(
+            "If set, gradient_accumulation_steps is derived from this total batch size, "
+            "the per-device train batch size and the number of processes."
+        ),
+    )
+    tokenized_cache_dir: Optional[str] = Field(
+        default=None,
+        description=(
+            "If set, the tokenized (and grouped) datasets are saved to this directory and "
+            "loaded from it on later runs instead of tokenizing again. "
+            "Ignored when overwrite_cache is set."
+        ),
+    )
     # _raw_datasets = None
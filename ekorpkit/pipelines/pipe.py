@@ -1,3 +1,4 @@
+import copy
 import logging
 import codecs
 import os
@@ -44,6 +45,45 @@ def apply_pipeline(df, pipeline, pipeline_args, update_args={}, verbose=True):
     return reduce(eKonf.pipe, pipeline_targets, df)
 
 
+def build_split_pipelines(
+    pipeline_args,
+    transform_pipeline,
+    process_pipeline,
+    split_name,
+    meta_path,
+    sample_path,
+    features=None,
+):
+    """Return the pipeline args and the transform and process pipelines of a split.
+
+    The save_metadata and save_samples args are copied before their outputs are
+    set to the split's paths, so they never leak into the shared pipeline config
+    of a builder or into its other splits.
+    """
+    pipeline_args = pipeline_args.copy()
+    transform_pipeline = list(transform_pipeline)
+    process_pipeline = list(process_pipeline)
+
+    pipe = "save_metadata"
+    if pipe in pipeline_args:
+        if pipe not in transform_pipeline:
+            transform_pipeline.append(pipe)
+        pipe_args = copy.deepcopy(pipeline_args[pipe])
+        pipe_args.path.output = meta_path
+        pipe_args.features = features
+        pipe_args.split_name = split_name
+        pipeline_args[pipe] = pipe_args
+    pipe = "save_samples"
+    if pipe in pipeline_args:
+        if pipe not in process_pipeline:
+            process_pipeline.append(pipe)
+        pipe_args = copy.deepcopy(pipeline_args[pipe])
+        pipe_args.path.output = sample_path
+        pipeline_args[pipe] = pipe_args
+
+    return pipeline_args, transform_pipeline, process_pipeline
+
+
 def split_column(df, args):
     args = eKonf.to_dict(args)
     verbose = args.get("verbose", False)
@@ -18,6 +18,7 @@ from pathlib import Path
 from ekorpkit import eKonf
 from .utils import (
     _download_models,
+    count_batch_files,
     move_files,
     split_prompts,
     parse_key_frames,
@@ -39,7 +40,8 @@ class DiscoDiffusion(BaseModel):
 
     def __init__(self, root_dir=None, config_name="default", **args):
         cfg = eKonf.compose(f"model/disco={config_name}")
-        cfg = eKonf.merge(cfg, args)
+        # args may hold the caller's config nodes, so only they are copied
+        cfg = eKonf.unsafe_merge(cfg, eKonf.to_config(args))
         super().__init__(root_dir=root_dir, **cfg)
 
         self.model_map.diffusion_models_256x256_list += (
@@ -1733,24 +1735,22 @@ class DiscoDiffusion(BaseModel):
         if args.steps <= args.calc_frames_skip_steps:
             raise Exception("ERROR: You can't skip more steps than your total steps")
 
-        batch_config_file = os.path.join(
-            batch_dir, f"{args.batch_name}(*)_settings.yaml"
-        )
+        batch_config_pattern = f"{args.batch_name}(*)_settings.yaml"
         if args.resume_run:
             if args.batch_num is None:
                 if args.run_to_resume == "latest":
-                    args.batch_num = len(glob(batch_config_file)) - 1
+                    args.batch_num = (
+                        count_batch_files(batch_dir, batch_config_pattern) - 1
+                    )
                     log.info("Resuming latest batch")
                 else:
                     args.batch_num = args.run_to_resume
                     log.info("Resuming batch with run_to_resume as batch_num")
             log.info(f"Resuming batch_num: {args.batch_num}")
 
-            _frame_file = os.path.join(
-                batch_dir, f"{args.batch_name}({args.batch_num})_*.png"
-            )
+            _frame_pattern = f"{args.batch_name}({args.batch_num})_*.png"
             if args.resume_from_frame == "latest":
-                start_frame = len(glob(_frame_file))
+                start_frame = count_batch_files(batch_dir, _frame_pattern)
                 if (
                     args.animation_mode != AnimMode.ANIM_3D
                     and args.turbo_mode
@@ -1768,7 +1768,7 @@ class DiscoDiffusion(BaseModel):
                 ):
                     start_frame = start_frame - (start_frame % int(args.turbo_steps))
                 if args.retain_overwritten_frames:
-                    existing_frames = len(glob(_frame_file))
+                    existing_frames = count_batch_files(batch_dir, _frame_pattern)
                     frames_to_save = existing_frames - start_frame
                     log.info(f"Moving {frames_to_save} frames to the Retained folder")
                     move_files(
@@ -1781,7 +1781,7 @@ class DiscoDiffusion(BaseModel):
                     )
         else:
             start_frame = 0
-            args.batch_num = len(glob(batch_config_file))
+            args.batch_num = count_batch_files(batch_dir, batch_config_pattern)
         args.start_frame = start_frame
         args.start_sample = start_frame
 
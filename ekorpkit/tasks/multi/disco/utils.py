@@ -1,4 +1,6 @@
 import os
+import re
+import fnmatch
 import logging
 import hashlib
 import shutil
@@ -81,6 +83,22 @@ def move_files(start_num, end_num, old_folder, new_folder, batch_name, batch_num
         os.rename(old_file, new_file)
 
 
+def count_batch_files(batch_dir, pattern):
+    """Count the entries in ``batch_dir`` whose names match the glob ``pattern``,
+    the same as ``len(glob(os.path.join(batch_dir, pattern)))``."""
+    if not os.path.isdir(batch_dir):
+        return 0
+    match = re.compile(fnmatch.translate(pattern)).match
+    # like glob, hidden names only match patterns starting with a dot
+    with_hidden = pattern.startswith(".")
+    with os.scandir(batch_dir) as it:
+        return sum(
+            1
+            for entry in it
+            if (with_hidden or not entry.name.startswith(".")) and match(entry.name)
+        )
+
+
 def split_prompts(prompts, max_frames):
     prompt_series = pd.Series([np.nan for a in range(max_frames)])
     for i, prompt in prompts.items():
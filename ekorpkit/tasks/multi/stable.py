@@ -360,6 +360,7 @@ class StableDiffusion(BaseModel):
             models = self.model.keys()
         if isinstance(models, str):
             models = [models]
+        hf_token = self.secrets.HUGGING_FACE_HUB_TOKEN.get_secret_value()
         for model in models:
             cfg = self.model[model]
             if cfg.pipeline == "StableDiffusionPipeline":
@@ -371,7 +372,7 @@ class StableDiffusion(BaseModel):
 
             self.__pipes__[model] = DiffusionPipeline.from_pretrained(
                 pretrained_model_name_or_path=cfg.name,
-                use_auth_token=self.secrets.HUGGING_FACE_HUB_TOKEN.get_secret_value(),
+                use_auth_token=hf_token,
                 revision=cfg.revision,
                 torch_dtype=torch.float16,
                 cache_dir=self.cache_dir,
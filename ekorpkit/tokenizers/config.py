@@ -1,3 +1,5 @@
+import copy
+import functools
 import logging
 from pydantic import BaseModel, Field, validator
 from typing import Optional, Union
@@ -14,6 +16,47 @@ from ekorpkit.models.transformer.config import ModelConfig
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4)
+def _load_pretrained_tokenizer(
+    name_or_path, cache_dir, use_fast, revision, use_auth_token
+):
+    return AutoTokenizer.from_pretrained(
+        name_or_path,
+        cache_dir=cache_dir,
+        use_fast=use_fast,
+        revision=revision,
+        use_auth_token=use_auth_token,
+    )
+
+
+def load_pretrained_tokenizer(
+    name_or_path, cache_dir, use_fast, revision, use_auth_token, mutable=False
+):
+    """Load a pretrained tokenizer, reusing earlier loads of hub tokenizers.
+
+    Tokenizers in local directories are always read again, as they may have been
+    overwritten by training. Hub tokenizers are shared between callers, so pass
+    mutable=True to get a copy that can be changed, e.g. by adding special tokens.
+    """
+    if Path(name_or_path).is_dir():
+        return AutoTokenizer.from_pretrained(
+            name_or_path,
+            cache_dir=cache_dir,
+            use_fast=use_fast,
+            revision=revision,
+            use_auth_token=use_auth_token,
+        )
+    tokenizer = _load_pretrained_tokenizer(
+        name_or_path, cache_dir, use_fast, revision, use_auth_token
+    )
+    return copy.deepcopy(tokenizer) if mutable else tokenizer
+
+
+def clear_pretrained_tokenizer_cache():
+    """Forget the hub tokenizers loaded by load_pretrained_tokenizer."""
+    _load_pretrained_tokenizer.cache_clear()
+
+
 class ModelType(str, Enum):
     UNIGRAM = "unigram"
     BPE = "bpe"
@@ -319,8 +362,10 @@ class TokenizerConfig(BaseModel):
 
         if tokenizer is None:
             if self.tokenizer_name_or_path:
-                tokenizer = AutoTokenizer.from_pretrained(
-                    self.tokenizer_name_or_path, **tokenizer_kwargs
+                tokenizer = load_pretrained_tokenizer(
+                    self.tokenizer_name_or_path,
+                    mutable=self.add_special_tokens,
+                    **tokenizer_kwargs,
                 )
             else:
                 raise ValueError(
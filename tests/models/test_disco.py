@@ -18,3 +18,40 @@ def test_disco():
         steps=100,
     )
     assert results is not None
+
+
+def test_count_batch_files(tmp_path):
+    import os
+    from glob import glob
+    from ekorpkit.tasks.multi.disco.utils import count_batch_files
+
+    batch_dir = str(tmp_path)
+    for name in [
+        "jeju(0)_settings.yaml",
+        "jeju(1)_settings.yaml",
+        "jeju(1)_0000.png",
+        "jeju(1)_0001.png",
+        "jeju(10)_0000.png",
+        "jeju(1)_0000.jpg",
+        "seoul(0)_settings.yaml",
+        ".jeju(1)_0002.png",
+    ]:
+        (tmp_path / name).touch()
+    os.mkdir(tmp_path / "jeju(2)_settings.yaml")
+
+    for pattern in [
+        "jeju(*)_settings.yaml",
+        "jeju(1)_*.png",
+        "jeju(1*)_*.png",
+        "jeju(3)_*.png",
+        ".jeju(1)_*.png",
+        "*",
+    ]:
+        expected = len(glob(os.path.join(batch_dir, pattern)))
+        assert count_batch_files(batch_dir, pattern) == expected
+    assert count_batch_files(batch_dir, "jeju(*)_settings.yaml") == 3
+    assert count_batch_files(batch_dir, "jeju(3)_*.png") == 0
+
+    missing_dir = str(tmp_path / "missing")
+    assert count_batch_files(missing_dir, "*.png") == 0
+    assert len(glob(os.path.join(missing_dir, "*.png"))) == 0
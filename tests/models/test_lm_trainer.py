@@ -0,0 +1,150 @@
+import datasets
+import numpy as np
+from ekorpkit.models.transformer.trainers.base import (
+    _group_texts,
+    _load_tokenized_cache,
+    _pack_sequences,
+    _save_tokenized_cache,
+)
+
+
+def _tokenized_datasets():
+    return datasets.DatasetDict(
+        {
+            "train": datasets.Dataset.from_dict({"input_ids": [[1, 2, 3], [4, 5]]}),
+            "validation": datasets.Dataset.from_dict({"input_ids": [[6, 7]]}),
+        }
+    )
+
+
+def _cache_settings(**kwargs):
+    settings = {
+        "tokenizer": "bert-base-uncased",
+        "vocab_size": 30522,
+        "max_seq_length": 128,
+        "line_by_line": False,
+        "packing": False,
+        "dataset_name": "wikitext",
+    }
+    settings.update(kwargs)
+    return settings
+
+
+def test_tokenized_cache_reused_with_same_settings(tmp_path):
+    cache_dir = str(tmp_path / "tokenized")
+    _save_tokenized_cache(_tokenized_datasets(), cache_dir, _cache_settings())
+
+    cached = _load_tokenized_cache(cache_dir, _cache_settings())
+    assert cached is not None
+    assert cached["train"]["input_ids"] == [[1, 2, 3], [4, 5]]
+    assert cached["validation"]["input_ids"] == [[6, 7]]
+
+
+def test_tokenized_cache_ignored_on_settings_mismatch(tmp_path):
+    cache_dir = str(tmp_path / "tokenized")
+    _save_tokenized_cache(_tokenized_datasets(), cache_dir, _cache_settings())
+
+    for changed in [
+        {"tokenizer": "roberta-base"},
+        {"vocab_size": 50265},
+        {"max_seq_length": 512},
+        {"line_by_line": True},
+        {"packing": True},
+        {"dataset_name": "bookcorpus"},
+    ]:
+        assert _load_tokenized_cache(cache_dir, _cache_settings(**changed)) is None
+
+
+def test_tokenized_cache_without_settings(tmp_path):
+    cache_dir = str(tmp_path / "tokenized")
+    # saved without settings, e.g. by an older version
+    _tokenized_datasets().save_to_disk(cache_dir)
+    assert _load_tokenized_cache(cache_dir, _cache_settings()) is None
+    assert _load_tokenized_cache(str(tmp_path / "missing"), _cache_settings()) is None
+
+
+SEP = 2
+
+
+def test_pack_sequences():
+    examples = {
+        "input_ids": [[5, 6, 7], [8, 9], [10, 11, 12]],
+        "attention_mask": [[1, 1, 1], [1, 1], [1, 1, 1]],
+    }
+    result = _pack_sequences(examples, 8, SEP)
+
+    # a separator is appended to each text, and a text that does not fit starts a new sequence
+    assert result["input_ids"] == [[5, 6, 7, SEP, 8, 9, SEP], [10, 11, 12, SEP]]
+    assert result["attention_mask"] == [[1] * 7, [1] * 4]
+
+
+def test_pack_sequences_keeps_existing_separator():
+    examples = {
+        "input_ids": [[1, 5, 6, SEP], [1, 7, SEP]],
+        "special_tokens_mask": [[1, 0, 0, 1], [1, 0, 1]],
+    }
+    result = _pack_sequences(examples, 8, SEP)
+
+    assert result["input_ids"] == [[1, 5, 6, SEP, 1, 7, SEP]]
+    assert result["special_tokens_mask"] == [[1, 0, 0, 1, 1, 0, 1]]
+
+
+def test_pack_sequences_splits_long_texts():
+    examples = {"input_ids": [list(range(10, 21)), [30]]}
+    result = _pack_sequences(examples, 4, SEP)
+
+    # 11 tokens and a separator make three full pieces, then the next text
+    assert result["input_ids"] == [
+        [10, 11, 12, 13],
+        [14, 15, 16, 17],
+        [18, 19, 20, SEP],
+        [30, SEP],
+    ]
+
+
+def test_pack_sequences_empty_inputs():
+    assert _pack_sequences({"input_ids": []}, 4, SEP) == {"input_ids": []}
+
+    examples = {"input_ids": [[], [5, 6], []], "attention_mask": [[], [1, 1], []]}
+    result = _pack_sequences(examples, 4, SEP)
+    assert result == {"input_ids": [[5, 6, SEP]], "attention_mask": [[1, 1, 1]]}
+
+    # without a separator token the texts are only packed
+    result = _pack_sequences({"input_ids": [[5, 6], [7]]}, 4, None)
+    assert result == {"input_ids": [[5, 6, 7]]}
+
+
+def test_group_texts():
+    examples = {
+        "input_ids": [[1, 2, 3], [4, 5], [6, 7, 8, 9]],
+        "attention_mask": [[1, 1, 1], [1, 1], [1, 1, 1, 1]],
+    }
+    result = _group_texts(examples, 4, ids_dtype=np.int16, with_labels=True)
+
+    # the remainder of 9 tokens after two chunks of 4 is dropped
+    np.testing.assert_array_equal(result["input_ids"], [[1, 2, 3, 4], [5, 6, 7, 8]])
+    np.testing.assert_array_equal(result["attention_mask"], np.ones((2, 4)))
+    np.testing.assert_array_equal(result["labels"], result["input_ids"])
+    assert result["input_ids"].dtype == np.int16
+
+
+def test_group_texts_short_and_empty_batches():
+    result = _group_texts({"input_ids": [[1, 2], [3]]}, 4)
+    assert len(result["input_ids"]) == 1
+    np.testing.assert_array_equal(result["input_ids"][0], [1, 2, 3])
+    assert "labels" not in result
+
+    assert _group_texts({"input_ids": []}, 4) == {"input_ids": []}
+
+
+def test_group_texts_shuffle_keeps_columns_aligned():
+    examples = {
+        "input_ids": [[i] * 2 for i in range(8)],
+        "special_tokens_mask": [[i] * 2 for i in range(8)],
+    }
+    result = _group_texts(examples, 4, shuffle=True)
+
+    np.testing.assert_array_equal(result["input_ids"], result["special_tokens_mask"])
+    assert sorted(result["input_ids"].reshape(-1).tolist()) == sorted(
+        sum(examples["input_ids"], [])
+    )
@@ -0,0 +1,132 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import torch
+from ekorpkit import eKonf
+from ekorpkit.models.transformer.simple import (
+    SimpleClassification,
+    _cast_to_precision,
+    _FoldParquetWriter,
+)
+
+
+class _Classifier(torch.nn.Module):
+    def __init__(self, num_labels):
+        super().__init__()
+        self.linear = torch.nn.Linear(4, num_labels)
+
+    def forward(self, x):
+        return (self.linear(x),)
+
+
+class _FakeModel:
+    """Stands in for simpletransformers' ClassificationModel in predictions."""
+
+    def __init__(self, model, labels_list):
+        self.model = model
+        self.args = SimpleNamespace(labels_list=labels_list)
+        self.calls = []
+
+    def predict(self, texts):
+        self.calls.append(list(texts))
+        dtype = self.model.linear.weight.dtype
+        x = torch.tensor([[float(len(t))] * 4 for t in texts], dtype=dtype)
+        logits = self.model(x)[0]
+        preds = [self.args.labels_list[i] for i in logits.argmax(-1).tolist()]
+        return preds, logits.detach().cpu().numpy()
+
+
+def _simple_classification(model_obj, predict_columns=None, bucket_size=None):
+    trainer = SimpleNamespace(
+        model_obj=model_obj,
+        labels_list=model_obj.args.labels_list,
+        model=SimpleNamespace(predict_bucket_size=bucket_size),
+        columns=SimpleNamespace(predict=predict_columns or {}),
+    )
+    trainer._predict_in_buckets = lambda data: SimpleClassification._predict_in_buckets(
+        trainer, data
+    )
+    return trainer
+
+
+def test_predict_data_bf16():
+    model = _cast_to_precision(_Classifier(3), "bf16")
+    assert model.linear.weight.dtype == torch.bfloat16
+
+    model_obj = _FakeModel(model, ["negative", "neutral", "positive"])
+    _, raw_outputs = model_obj.predict(["a", "bb"])
+    assert raw_outputs.dtype == np.float32
+
+    trainer = _simple_classification(
+        model_obj,
+        predict_columns={eKonf.Keys.MODEL_OUTPUTS: True, eKonf.Keys.LABEL_PROBS: True},
+    )
+    preds = SimpleClassification.predict_data(trainer, ["a", "bb", "ccc"])
+
+    assert len(preds[eKonf.Keys.PREDICTED.value]) == 3
+    assert len(preds[eKonf.Keys.PRED_PROBS.value]) == 3
+    for probs in preds[eKonf.Keys.LABEL_PROBS.value].values():
+        assert probs.dtype == np.float32
+    for output in preds[eKonf.Keys.MODEL_OUTPUTS.value]:
+        assert all(isinstance(p, np.float32) for p in output.values())
+
+
+def test_predict_in_buckets_keeps_input_order():
+    model_obj = _FakeModel(_Classifier(3), ["negative", "neutral", "positive"])
+    # lengths out of order, with 7 texts so the last bucket of 3 is partial
+    data = ["ccccc", "a", "dddddddd", "bb", "eee", "ffffffffff", "g"]
+
+    expected_preds, expected_raw = model_obj.predict(data)
+    model_obj.calls = []
+    trainer = _simple_classification(model_obj, bucket_size=3)
+    preds, raw_outputs = SimpleClassification._predict_in_buckets(trainer, data)
+
+    assert [len(c) for c in model_obj.calls] == [3, 3, 1]
+    # each bucket holds texts of similar length
+    assert model_obj.calls[0] == ["a", "g", "bb"]
+    assert preds == expected_preds
+    np.testing.assert_allclose(raw_outputs, expected_raw, rtol=1e-6)
+    for text, row in zip(data, raw_outputs):
+        np.testing.assert_allclose(row, model_obj.predict([text])[1][0], rtol=1e-6)
+
+
+def test_predict_in_buckets_without_bucketing():
+    model_obj = _FakeModel(_Classifier(2), ["negative", "positive"])
+    trainer = _simple_classification(model_obj, bucket_size=8)
+    preds, raw_outputs = SimpleClassification._predict_in_buckets(trainer, ["a", "bb"])
+
+    assert model_obj.calls == [["a", "bb"]]
+    assert len(preds) == 2
+    assert raw_outputs.shape == (2, 2)
+
+
+def test_fold_parquet_writer_with_different_null_patterns(tmp_path):
+    data = pd.DataFrame(
+        {
+            "id": [0, 1, 2, 3],
+            "text": ["a", "b", "c", "d"],
+            # all null in the first fold
+            "note": [None, None, "x", None],
+            # float in the full data, without nulls in the first fold
+            "score": [1.0, 2.0, np.nan, 4.0],
+        }
+    )
+    folds = [data.iloc[:2], data.iloc[2:]]
+    path = str(tmp_path / "cv.parquet")
+
+    writer = _FoldParquetWriter(path, data)
+    try:
+        for fold in folds:
+            preds = pd.DataFrame({"pred_labels": ["pos"] * len(fold)}, index=fold.index)
+            writer.write(pd.concat([fold, preds], axis=1))
+    finally:
+        writer.close()
+
+    cv_preds = pd.read_parquet(path)
+    assert len(cv_preds) == 4
+    assert cv_preds["id"].tolist() == [0, 1, 2, 3]
+    assert cv_preds["note"].tolist() == [None, None, "x", None]
+    assert cv_preds["score"].dtype == np.float64
+    assert np.isnan(cv_preds["score"][2])
+    assert cv_preds["pred_labels"].tolist() == ["pos"] * 4
@@ -19,3 +19,38 @@ def test_dependencies():
     deps = eKonf.dependencies("all")
 
     assert type(deps) == set
+
+
+def test_unsafe_merge():
+    cfg = eKonf.to_config({"a": 1, "nested": {"b": 2, "c": 3}})
+    args = eKonf.to_config({"nested": {"c": 4}, "extra": {"d": 5}})
+
+    merged = eKonf.unsafe_merge(cfg, args)
+    assert eKonf.to_dict(merged) == {
+        "a": 1,
+        "nested": {"b": 2, "c": 4},
+        "extra": {"d": 5},
+    }
+    # the first config is merged into in place
+    assert merged is cfg
+
+    # nodes of the other configs are reused, so writes to the result leak into them
+    merged.extra.d = 6
+    assert args.extra.d == 6
+
+    # eKonf.merge copies its inputs
+    cfg = eKonf.to_config({"a": 1})
+    args = eKonf.to_config({"extra": {"d": 5}})
+    merged = eKonf.merge(cfg, args)
+    merged.extra.d = 6
+    assert args.extra.d == 5
+    assert "extra" not in cfg
+
+
+def test_unsafe_merge_with_copied_args():
+    caller_cfg = eKonf.to_config({"d": 5})
+    cfg = eKonf.to_config({"a": 1})
+
+    merged = eKonf.unsafe_merge(cfg, eKonf.to_config({"extra": caller_cfg}))
+    merged.extra.d = 6
+    assert caller_cfg.d == 5